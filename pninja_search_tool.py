@@ -1,20 +1,70 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import os
-import re
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import json
 import csv
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import queue
 import time
+import copy
+import operator
+import itertools
+from collections import OrderedDict
+
+# Prefer orjson for the JSON hot paths when it is installed
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = lambda v: orjson.dumps(v).decode()
+except ImportError:
+    _loads = json.loads
+    _dumps = lambda v: json.dumps(v, separators=(',', ':'), ensure_ascii=False)
 
 # --- Configuration ---
 API_BASE_URL = "https://storeapi.parcelninja.com/api/v1"
 
+# List endpoint paging: records per page and the most pages pulled for one term
+PAGE_SIZE = 100
+MAX_PAGES = 5
+
+# Response cache: seconds a per-term result stays fresh, and max entries kept
+CACHE_TTL = 120.0
+CACHE_MAX_ENTRIES = 1024
+
+# Max distinct result schemas whose sorted column order is remembered
+HEADER_CACHE_MAX_ENTRIES = 64
+
+# Results table: above this many rows, insert an initial window then the rest in idle-time batches
+TABLE_VIRTUAL_THRESHOLD = 2000
+TABLE_INITIAL_ROWS = 500
+TABLE_BATCH_ROWS = 100
+
+# Column sizing: rows sampled, approximate pixels per character, padding and maximum width
+COLUMN_SAMPLE_ROWS = 64
+COLUMN_CHAR_PX = 7
+COLUMN_PAD_PX = 16
+COLUMN_MAX_PX = 400
+
+# Queue polling: fast while a search is running, slow when idle; max messages handled per tick
+POLL_ACTIVE_MS = 10
+POLL_IDLE_MS = 250
+POLL_MAX_MESSAGES = 256
+
+# Log levels in increasing severity; messages below PARCELNINJA_LOG_LEVEL (default DEBUG) are dropped
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+
+# Write buffer size used for CSV exports
+CSV_BUFFER_SIZE = 1 << 20
+
 # Mapping of Store IDs to friendly names
 STORE_ID_TO_NAME = {
     "7b0fb2ac-51bd-47ea-847e-cfb1584b4aa2": "Diesel",
@@ -24,6 +74,43 @@ STORE_ID_TO_NAME = {
     "963f57af-6f46-4d6d-b07c-dc4aa684cdfa": "Reebok",
 }
 
+# Precomputed endpoints and request headers
+_OUTBOUND_BY_CLIENT_URL = f"{API_BASE_URL}/outbounds/0"
+_SEARCH_URLS = {search_type: f"{API_BASE_URL}/{search_type}s" for search_type in ("outbound", "inbound")}
+_JSON_HEADERS = {"Accept": "application/json"}
+
+# Separators accepted between pasted search terms, normalised to newlines
+_TERM_SPLIT_TABLE = str.maketrans({',': '\n', ';': '\n', '\t': '\n'})
+
+# Last formatted log timestamp as (epoch_second, "HH:MM:SS"), reused within the same second
+_ts_cache = [(0, '')]
+
+# Endless None values for building dict-keys accumulators with dict.update(zip(keys, _NONES))
+_NONES = itertools.repeat(None)
+
+# Interned strings repeated on every result row
+_STORE_NAMES_INTERN = {name: sys.intern(name) for name in STORE_ID_TO_NAME.values()}
+_ERR_NOT_FOUND = sys.intern('Not Found')
+
+# Shared placeholder for terms that returned nothing; copied per term
+_NOT_FOUND_TEMPLATE = {'status_error': _ERR_NOT_FOUND}
+
+# Shared HTTP session so keep-alive reuses the TLS connection across terms and searches
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+_SESSION.headers.update(_JSON_HEADERS)
+
+def _total_pages(response: requests.Response) -> Optional[int]:
+    """Returns the x-parcelninja-total-pages header as an int, or None if absent or invalid."""
+    try:
+        return int(response.headers["x-parcelninja-total-pages"])
+    except (KeyError, ValueError):
+        return None
+
 @dataclass
 class Store:
     """A dataclass to hold credentials and info for a single store."""
@@ -31,11 +118,23 @@ class Store:
     name: str
     username: str
     password: str
+    _auth: Optional[HTTPBasicAuth] = field(default=None, repr=False, compare=False)
+
+    @property
+    def auth(self) -> HTTPBasicAuth:
+        """Lazily builds and caches the basic auth object for this store."""
+        if self._auth is None:
+            self._auth = HTTPBasicAuth(self.username, self.password)
+        return self._auth
 
 class ParcelninjaSearchTool(tk.Tk):
     """
     A GUI application for searching Parcelninja Inbounds and Outbounds.
     """
+    # Shared row tag tuples for the results table
+    _ERROR_TAG = ('error',)
+    _EMPTY_TAG = ()
+
     def __init__(self, stores: List[Store]):
         super().__init__()
         self.stores = stores
@@ -54,13 +153,34 @@ class ParcelninjaSearchTool(tk.Tk):
             self.destroy()
             return
 
-        self.results_data: List[Dict[str, Any]] = []
-        self.api_queue = queue.Queue()
+        # (raw_record, flat_record) pairs, flattened once and shared by the table and CSV export
+        self.results_data: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        self.api_queue = queue.SimpleQueue()
         self.stop_event = threading.Event()
         self.is_searching = False
+        self._log_level = LOG_LEVELS.get(os.environ.get("PARCELNINJA_LOG_LEVEL", "DEBUG").strip().upper(), LOG_LEVELS["DEBUG"])
+        # Checked before building DEBUG messages so they cost nothing when disabled
+        self._debug_enabled = self._log_level <= LOG_LEVELS["DEBUG"]
+
+        # (store.id, search_type, search_field, term, fast_probe) -> (fetched_at, items)
+        self._resp_cache: "OrderedDict[tuple, tuple[float, list]]" = OrderedDict()
+        self._resp_cache_lock = threading.Lock()
+
+        # Bumped whenever the table is cleared so stale batched inserts stop
+        self._table_generation = 0
+        # Column order of the current results, shared with the CSV export
+        self._sorted_headers: List[str] = []
+
+        # Single background worker for flattening results and writing exports off the Tk thread
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pn-io")
+        # IO jobs submitted whose 'table' / 'export_done' message hasn't been handled yet
+        self._io_pending = 0
+        # frozenset of result keys -> sorted column order; only touched on the IO worker
+        self._header_cache: Dict[frozenset, List[str]] = {}
 
         self._create_widgets()
-        self.after(100, self.process_api_queue)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_job = self.after(POLL_IDLE_MS, self.process_api_queue)
 
     def _create_widgets(self):
         # --- Main Layout ---
@@ -130,6 +250,9 @@ class ParcelninjaSearchTool(tk.Tk):
         self.refresh_button = ttk.Button(button_frame, text="Refresh / Reset", command=self.reset_ui)
         self.refresh_button.pack(side=tk.LEFT, padx=(10, 2))
 
+        self.fast_probe_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top_frame, text="Fast probe (first match only)", variable=self.fast_probe_var).grid(row=0, column=5, padx=(10, 0), sticky="e")
+
         top_frame.grid_columnconfigure(3, weight=1)
 
         # --- Results Table ---
@@ -137,6 +260,7 @@ class ParcelninjaSearchTool(tk.Tk):
         vsb = ttk.Scrollbar(results_frame, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(results_frame, orient="horizontal", command=self.tree.xview)
         self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.tag_configure('error', foreground='red')
 
         self.tree.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
@@ -156,13 +280,32 @@ class ParcelninjaSearchTool(tk.Tk):
         self.export_button = ttk.Button(status_frame, text="Export Results to CSV", command=self.export_to_csv, state="disabled")
         self.export_button.pack(side=tk.RIGHT)
 
+    @staticmethod
+    def _format_log(message: str, level: str) -> str:
+        """Formats a log line with a timestamp (cached per second) and level."""
+        sec = int(time.time())
+        cached_sec, timestamp = _ts_cache[0]
+        if cached_sec != sec:
+            timestamp = time.strftime("%H:%M:%S", time.localtime(sec))
+            _ts_cache[0] = (sec, timestamp)
+        return f"[{timestamp}] [{level}] {message}\n"
+
     def log(self, message: str, level: str = "INFO"):
         """Adds a message to the logger window."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_msg = f"[{timestamp}] [{level}] {message}\n"
-        
+        if LOG_LEVELS[level] < self._log_level:
+            return
+        self._append_log_text(self._format_log(message, level))
+
+    def _queue_log(self, message: str, level: str = "INFO"):
+        """Queues a pre-formatted log line from a worker thread for the UI thread."""
+        if LOG_LEVELS[level] < self._log_level:
+            return
+        self.api_queue.put({"type": "log", "text": self._format_log(message, level)})
+
+    def _append_log_text(self, text: str):
+        """Appends already formatted log text to the logger window in one Tk write."""
         self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, formatted_msg)
+        self.log_text.insert(tk.END, text)
         self.log_text.see(tk.END)
         self.log_text.config(state='disabled')
 
@@ -187,6 +330,10 @@ class ParcelninjaSearchTool(tk.Tk):
             # though usually we just want to clear immediately.
         
         self.search_term_var.set("")
+        # A reset should fetch fresh data on the next search
+        with self._resp_cache_lock:
+            self._resp_cache.clear()
+        self._table_generation += 1
         self.tree.delete(*self.tree.get_children())
         self.results_data = []
         
@@ -201,6 +348,12 @@ class ParcelninjaSearchTool(tk.Tk):
         
         self.log("Application reset.")
 
+    def _on_close(self):
+        """Stops background work so pending lookups don't hold the process open, then closes."""
+        self.stop_event.set()
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
     def stop_search(self):
         """Signals the background thread to stop processing."""
         if self.is_searching:
@@ -220,8 +373,9 @@ class ParcelninjaSearchTool(tk.Tk):
             messagebox.showwarning("Input Required", "Please enter one or more search terms.")
             return
 
-        # Split by comma or newline
-        search_terms = [term.strip() for term in re.split(r'[,\n]', search_terms_raw) if term.strip()]
+        # Split by comma, semicolon, tab or newline, dropping duplicates (first-seen order kept)
+        raw = search_terms_raw.translate(_TERM_SPLIT_TABLE)
+        search_terms = list(dict.fromkeys(term for term in map(str.strip, raw.splitlines()) if term))
         selected_store = next((s for s in self.stores if s.name == store_name), None)
 
         if not selected_store:
@@ -235,146 +389,311 @@ class ParcelninjaSearchTool(tk.Tk):
         self.stop_button.config(state="normal")
         self.refresh_button.config(state="disabled")
         self.export_button.config(state="disabled")
+        self._table_generation += 1
         self.tree.delete(*self.tree.get_children()) # Clear previous results
         self.results_data = []
         
         self.status_label.config(text=f"Searching in {store_name} for {len(search_terms)} term(s)...")
         self.log(f"Starting search in store '{store_name}' ({selected_store.id})")
-        self.log(f"Type: {search_type}, Field: {search_field}, Terms: {len(search_terms)}")
+        fast_probe = self.fast_probe_var.get()
+        self.log(f"Type: {search_type}, Field: {search_field}, Terms: {len(search_terms)}, Fast probe: {fast_probe}")
 
         # Run the API calls in a separate thread
         thread = threading.Thread(
             target=self.run_api_search,
-            args=(selected_store, search_type, search_field, search_terms)
+            args=(selected_store, search_type, search_field, search_terms, fast_probe)
         )
         thread.daemon = True
         thread.start()
 
-    def run_api_search(self, store: Store, search_type: str, search_field: str, terms: List[str]):
-        """The actual worker function that calls the API."""
+        self._poll_now()
+
+    def _poll_now(self):
+        """Polls the API queue right away instead of waiting out the idle interval."""
+        self.after_cancel(self._poll_job)
+        self._poll_job = self.after(POLL_ACTIVE_MS, self.process_api_queue)
+
+    def _submit_io(self, fn, *args):
+        """Runs fn on the IO worker; the queue is polled at the active rate until it reports back."""
+        self._io_pending += 1
+        self._io_pool.submit(fn, *args)
+
+    def run_api_search(self, store: Store, search_type: str, search_field: str, terms: List[str], fast_probe: bool = False):
+        """The actual worker function that calls the API, fanning terms out over a thread pool."""
         results = []
-        
+        # term -> rows, filled in completion order and read back in input order
+        results_by_term: Dict[str, List[Dict[str, Any]]] = {}
+
+        # start_search already dedupes; kept as a cheap guard for other callers
+        terms = list(dict.fromkeys(t for t in terms if t))
         total = len(terms)
+        if not total:
+            self.api_queue.put({"type": "done", "results": results})
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(8, total))
+        try:
+            futures = {
+                executor.submit(self._fetch_one, store, search_type, search_field, term, fast_probe): term
+                for term in terms
+            }
+            
+            for completed, future in enumerate(as_completed(futures), start=1):
+                # Check for stop signal
+                if self.stop_event.is_set():
+                    self._queue_log("Search stopped by user.", "WARN")
+                    break
+
+                term = futures[future]
+                try:
+                    results_by_term[term] = future.result()
+                except Exception as e:
+                    # An unexpected response shape must not kill the search before "done" is posted
+                    self._queue_log(f"Unexpected error for '{term}': {e}", "ERROR")
+                    results_by_term[term] = [{
+                        'shipment_id_searched': term, 
+                        'status_error': f"Error: {e}", 
+                        '_store_name': store.name
+                    }]
+                self._queue_log(f"Completed ({completed}/{total}): {term}")
+        finally:
+            # Don't wait on in-flight requests; terms not yet started are cancelled
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Keep the rows in the order the terms were entered, not the order requests finished
+        for term in terms:
+            results.extend(results_by_term.get(term, ()))
         
-        for index, term in enumerate(terms):
-            # Check for stop signal
-            if self.stop_event.is_set():
-                self.api_queue.put({"type": "log", "msg": "Search stopped by user.", "level": "WARN"})
-                break
+        # Signal completion
+        self.api_queue.put({"type": "done", "results": results})
 
-            self.api_queue.put({"type": "log", "msg": f"Searching ({index+1}/{total}): {term}..."})
+    def _fetch_one(self, store: Store, search_type: str, search_field: str, term: str, fast_probe: bool = False) -> List[Dict[str, Any]]:
+        """Fetches the results for a single search term. Runs on a pool worker thread."""
+        if self.stop_event.is_set():
+            return []
 
-            try:
-                found_for_term = False
+        key = (store.id, search_type, search_field, term, fast_probe)
+        with self._resp_cache_lock:
+            cached = self._resp_cache.get(key)
+            if cached and time.monotonic() - cached[0] < CACHE_TTL:
+                self._resp_cache.move_to_end(key)
+                if self._debug_enabled:
+                    self._queue_log(f"Cache hit: {term}", "DEBUG")
+                return copy.copy(cached[1])
+
+        results = []
+
+        self._queue_log(f"Searching: {term}...")
+
+        try:
+            found_for_term = False
+            # Set when any page fails, so partial results are shown but never cached
+            request_failed = False
+            
+            # Logic for Client ID direct lookup (faster/specific)
+            if search_type == 'outbound' and search_field == 'Client ID':
+                url = _OUTBOUND_BY_CLIENT_URL
+                headers = {"X-Client-Id": term}
                 
-                # Logic for Client ID direct lookup (faster/specific)
-                if search_type == 'outbound' and search_field == 'Client ID':
-                    url = f"{API_BASE_URL}/outbounds/0"
-                    headers = {"Accept": "application/json", "X-Client-Id": term}
-                    
-                    self.api_queue.put({"type": "log", "msg": f"GET {url} [X-Client-Id: {term}]", "level": "DEBUG"})
-                    
-                    response = requests.get(url, headers=headers, auth=(store.username, store.password), timeout=20)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        # Tag with store name for the results table
-                        data['_store_name'] = store.name 
-                        results.append(data)
-                        found_for_term = True
-                    elif response.status_code == 404:
-                         self.api_queue.put({"type": "log", "msg": f"Term '{term}' not found (404).", "level": "WARN"})
-                    else:
-                        error_msg = f"HTTP {response.status_code}: {response.text[:50]}"
-                        self.api_queue.put({"type": "log", "msg": f"Error for '{term}': {error_msg}", "level": "ERROR"})
+                if self._debug_enabled:
+                    self._queue_log(f"GET {url} [X-Client-Id: {term}]", "DEBUG")
                 
+                response = _SESSION.get(url, headers=headers, auth=store.auth, timeout=20)
+                
+                if response.status_code == 200:
+                    data = _loads(response.content)
+                    # Tag with store name for the results table
+                    data['_store_name'] = store.name 
+                    results.append(data)
+                    found_for_term = True
+                elif response.status_code == 404:
+                     self._queue_log(f"Term '{term}' not found (404).", "WARN")
                 else:
-                    # General search logic for other fields
-                    url = f"{API_BASE_URL}/{search_type}s" 
-                    end_date = datetime.utcnow()
-                    start_date = end_date - timedelta(days=730) # 2-year search window
-                    
-                    api_search_field = {
-                        "Client ID": "clientId",
-                        "Channel ID": "channelId",
-                        "Supplier Reference": "supplierReference"
-                    }.get(search_field, "search") 
-
-                    params = {
-                        "startDate": start_date.strftime('%Y%m%d'),
-                        "endDate": end_date.strftime('%Y%m%d'),
-                        "search": term,
-                        "pageSize": 100 
-                    }
-                    
-                    self.api_queue.put({"type": "log", "msg": f"GET {url} ?search={term}", "level": "DEBUG"})
+                    error_msg = f"HTTP {response.status_code}: {response.text[:50]}"
+                    self._queue_log(f"Error for '{term}': {error_msg}", "ERROR")
+            
+            else:
+                # General search logic for other fields
+                url = _SEARCH_URLS[search_type]
+                end_date = datetime.utcnow()
+                start_date = end_date - timedelta(days=730) # 2-year search window
+
+                # A fast probe only needs to know whether anything matches
+                page_size = 1 if fast_probe else PAGE_SIZE
+                params = {
+                    "startDate": start_date.strftime('%Y%m%d'),
+                    "endDate": end_date.strftime('%Y%m%d'),
+                    "search": term,
+                    "pageSize": page_size,
+                    "page": 1
+                }
+                
+                found_items = []
+                for page in range(1, MAX_PAGES + 1):
+                    params["page"] = page
+                    if self._debug_enabled:
+                        self._queue_log(f"GET {url} ?search={term}&page={page}", "DEBUG")
 
-                    response = requests.get(url, headers={"Accept": "application/json"}, params=params, auth=(store.username, store.password), timeout=30)
+                    response = _SESSION.get(url, params=params, auth=store.auth, timeout=30)
                     
-                    if response.status_code == 200:
-                        data = response.json()
-                        found_items = data.get(f"{search_type}s", [])
-                        if found_items:
-                            for item in found_items:
-                                item['_store_name'] = store.name
-                                results.append(item)
-                            found_for_term = True
-                        else:
-                            self.api_queue.put({"type": "log", "msg": f"Term '{term}' returned 0 results.", "level": "WARN"})
-                    else:
-                        self.api_queue.put({"type": "log", "msg": f"Error for '{term}': HTTP {response.status_code}", "level": "ERROR"})
-
-                if not found_for_term:
-                    # Add a placeholder result indicating failure
-                    results.append({
-                        'shipment_id_searched': term, 
-                        'status_error': 'Not Found', 
-                        '_store_name': store.name
-                    })
-
-            except requests.RequestException as e:
-                self.api_queue.put({"type": "log", "msg": f"Exception for '{term}': {str(e)}", "level": "ERROR"})
-                results.append({
-                    'shipment_id_searched': term, 
-                    'status_error': f"Network Error: {str(e)}", 
-                    '_store_name': store.name
-                })
-        
-        # Signal completion
-        self.api_queue.put({"type": "done", "results": results})
+                    if response.status_code != 200:
+                        self._queue_log(f"Error for '{term}': HTTP {response.status_code}", "ERROR")
+                        request_failed = True
+                        break
+
+                    page_items = _loads(response.content).get(f"{search_type}s", [])
+                    found_items.extend(page_items)
+                    if fast_probe:
+                        break
+                    # Use the API's page count; fall back to "this page came back full" if it's missing
+                    total_pages = _total_pages(response)
+                    has_more = page < total_pages if total_pages is not None else len(page_items) >= page_size
+                    if not has_more:
+                        break
+                else:
+                    self._queue_log(f"Term '{term}' has more than {MAX_PAGES} pages of results; only the first {MAX_PAGES} were fetched.", "WARN")
+
+                if found_items:
+                    for item in found_items:
+                        item['_store_name'] = store.name
+                        results.append(item)
+                    found_for_term = True
+                elif not request_failed:
+                    self._queue_log(f"Term '{term}' returned 0 results.", "WARN")
+
+            if found_for_term and not request_failed:
+                self._cache_response(key, results)
+            else:
+                # Add a placeholder result indicating failure
+                results.append({**_NOT_FOUND_TEMPLATE, 'shipment_id_searched': term, '_store_name': store.name})
+
+        except (requests.RequestException, ValueError) as e:
+            self._queue_log(f"Exception for '{term}': {str(e)}", "ERROR")
+            results.append({
+                'shipment_id_searched': term, 
+                'status_error': f"Network Error: {str(e)}", 
+                '_store_name': store.name
+            })
+
+        return results
+
+    def _cache_response(self, key: tuple, items: List[Dict[str, Any]]):
+        """Stores fetched items in the bounded FIFO response cache."""
+        with self._resp_cache_lock:
+            self._resp_cache[key] = (time.monotonic(), copy.copy(items))
+            self._resp_cache.move_to_end(key)
+            while len(self._resp_cache) > CACHE_MAX_ENTRIES:
+                self._resp_cache.popitem(last=False)
 
     def process_api_queue(self):
         """Process messages from the API thread."""
+        log_buf = []
+        done_msg = None
+        table_msg = None
+        export_msg = None
         try:
-            while True:
-                msg = self.api_queue.get_nowait()
-                
-                if msg["type"] == "log":
-                    self.log(msg["msg"], msg.get("level", "INFO"))
-                
-                elif msg["type"] == "done":
-                    results = msg["results"]
-                    self.results_data = results
-                    self.update_results_table(results)
-                    self.is_searching = False
-                    self.search_button.config(state="normal")
-                    self.stop_button.config(state="disabled")
-                    self.refresh_button.config(state="normal")
+            # Drain only what qsize() reports so an idle tick never raises queue.Empty;
+            # the except clause remains as a safety net
+            try:
+                for _ in range(min(self.api_queue.qsize(), POLL_MAX_MESSAGES)):
+                    msg = self.api_queue.get_nowait()
                     
-                    count = len([r for r in results if 'status_error' not in r])
-                    self.status_label.config(text=f"Search complete. Found {count} valid record(s).")
+                    if msg["type"] == "log":
+                        log_buf.append(msg["text"])
                     
-                    if results:
-                        self.export_button.config(state="normal")
-                    self.log(f"Search Finished. Total rows: {len(results)}")
+                    elif msg["type"] == "done":
+                        done_msg = msg
+
+                    elif msg["type"] == "table":
+                        self._io_pending -= 1
+                        table_msg = msg
 
-        except queue.Empty:
-            pass
+                    elif msg["type"] == "export_done":
+                        self._io_pending -= 1
+                        export_msg = msg
+            except queue.Empty:
+                pass
+
+            # Coalesce everything drained this tick into a single log write
+            if log_buf:
+                self._append_log_text("".join(log_buf))
+
+            if done_msg is not None:
+                self._finish_search(done_msg["results"])
+
+            if table_msg is not None and table_msg["generation"] == self._table_generation:
+                self._show_results(table_msg["rows"], table_msg["headers"], table_msg["error"])
+
+            if export_msg is not None:
+                self._finish_export(export_msg["path"], export_msg["error"])
         finally:
-            self.after(100, self.process_api_queue)
+            delay = POLL_ACTIVE_MS if self.is_searching or self._io_pending else POLL_IDLE_MS
+            self._poll_job = self.after(delay, self.process_api_queue)
+
+    def _finish_search(self, results: List[Dict[str, Any]]):
+        """Restores the controls and hands the results to the IO worker for flattening."""
+        self.is_searching = False
+        self.search_button.config(state="normal")
+        self.stop_button.config(state="disabled")
+        self.refresh_button.config(state="normal")
+        self.status_label.config(text=f"Preparing {len(results)} row(s)...")
+
+        self._submit_io(self._prepare_results, results, self._table_generation)
+
+    def _prepare_results(self, results: List[Dict[str, Any]], generation: int):
+        """Flattens results and computes the column order. Runs on the IO worker."""
+        try:
+            rows, sorted_headers = self._build_table(results)
+        except Exception as e:
+            # Always report back, otherwise the UI would wait on "Preparing..." forever
+            self.api_queue.put({"type": "table", "rows": [], "headers": [], "generation": generation,
+                                "error": f"Could not prepare results: {e}"})
+            return
+
+        self.api_queue.put({"type": "table", "rows": rows, "headers": sorted_headers, "generation": generation, "error": None})
 
-    def update_results_table(self, results: List[Dict[str, Any]]):
+    def _build_table(self, results: List[Dict[str, Any]]) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], List[str]]:
+        """Returns the (raw, flat) row pairs and the sorted column order for a set of results."""
+        rows = [(record, self._flatten_record(record)) for record in results]
+
+        # We want 'Store' to be the first column
+        all_headers = {'Store': None}
+        for _, flat_record in rows:
+            all_headers.update(zip(flat_record.keys(), _NONES))
+
+        # Sort headers: Store first, then everything else alphabetically.
+        # Reruns returning the same schema reuse the previous ordering.
+        header_key = frozenset(all_headers)
+        sorted_headers = self._header_cache.get(header_key)
+        if sorted_headers is None:
+            sorted_headers = ['Store'] + sorted([h for h in all_headers if h != 'Store'])
+            if len(self._header_cache) >= HEADER_CACHE_MAX_ENTRIES:
+                self._header_cache.clear()
+            self._header_cache[header_key] = sorted_headers
+
+        return rows, sorted_headers
+
+    def _show_results(self, rows: List[Tuple[Dict[str, Any], Dict[str, Any]]], headers: List[str], error: Optional[str] = None):
+        """Displays prepared search results."""
+        if error:
+            self.results_data = []
+            self.status_label.config(text="Search complete, but the results could not be displayed.")
+            self.log(error, "ERROR")
+            return
+
+        self.results_data = rows
+        self.update_results_table(rows, headers)
+
+        count = len([r for r, _ in rows if 'status_error' not in r])
+        self.status_label.config(text=f"Search complete. Found {count} valid record(s).")
+        
+        if rows:
+            self.export_button.config(state="normal")
+        self.log(f"Search Finished. Total rows: {len(rows)}")
+
+    def update_results_table(self, results: List[Tuple[Dict[str, Any], Dict[str, Any]]], sorted_headers: List[str]):
         """Clears and repopulates the results table."""
+        self._table_generation += 1
         self.tree.delete(*self.tree.get_children())
         for col in self.tree["columns"]:
             self.tree.heading(col, text="")
@@ -383,58 +702,77 @@ class ParcelninjaSearchTool(tk.Tk):
         if not results:
             return
 
-        # Flatten nested dicts
-        flat_results = []
-        all_headers = set()
-        
-        # We want 'Store' to be the first column
-        all_headers.add('Store')
-        
-        for record in results:
-            flat_record = self._flatten_dict(record)
-            
-            # Map the internal _store_name to a clean 'Store' key
-            if '_store_name' in flat_record:
-                flat_record['Store'] = flat_record.pop('_store_name')
-            
-            flat_results.append(flat_record)
-            all_headers.update(flat_record.keys())
-        
-        # Sort headers: Store first, then everything else alphabetically
-        sorted_headers = ['Store'] + sorted([h for h in all_headers if h != 'Store'])
+        # Records and headers were prepared once on the IO worker
+        flat_results = [flat_record for _, flat_record in results]
+        self._sorted_headers = sorted_headers
+
+        # Size columns from the header and a sample of the data
+        sample = flat_results[:COLUMN_SAMPLE_ROWS]
+        widths = [
+            min(max(len(col), max((len(str(r.get(col, ''))) for r in sample), default=0)) * COLUMN_CHAR_PX + COLUMN_PAD_PX,
+                COLUMN_MAX_PX)
+            for col in sorted_headers
+        ]
 
-        # Configure treeview columns
+        # Configure treeview columns with display suppressed, so layout happens once
+        self.tree.configure(displaycolumns=())
         self.tree["columns"] = sorted_headers
-        for col in sorted_headers:
+        for col, width in zip(sorted_headers, widths):
+            # Cell anchor defaults to 'w'; only the heading needs it set
             self.tree.heading(col, text=col, anchor='w')
-            # Adjust width based on column name length roughly
-            width = max(len(col) * 10, 100)
-            self.tree.column(col, anchor="w", width=width, stretch=tk.NO)
-
-        # Populate data
-        for record in flat_results:
-            row_values = [record.get(col, "") for col in sorted_headers]
-            # Optional: Tag rows with errors in red
-            tag = 'normal'
-            if 'status_error' in record and record['status_error']:
-                tag = 'error'
-            
-            self.tree.insert("", "end", values=row_values, tags=(tag,))
-        
-        self.tree.tag_configure('error', foreground='red')
-
-    def _flatten_dict(self, d: Dict[str, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
-        """Flattens a nested dictionary."""
-        items = []
-        for k, v in d.items():
-            new_key = parent_key + sep + k if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self._flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                items.append((new_key, json.dumps(v)))
-            else:
-                items.append((new_key, v))
-        return dict(items)
+            self.tree.column(col, width=width, stretch=tk.NO)
+        self.tree.configure(displaycolumns='#all')
+
+        # Flush the column layout once before filling
+        self.tree.update_idletasks()
+
+        # Populate data; large result sets get a first window now and the rest on idle
+        total = len(flat_results)
+        first = TABLE_INITIAL_ROWS if total > TABLE_VIRTUAL_THRESHOLD else total
+        self._insert_rows(flat_results, sorted_headers, 0, first)
+        if first < total:
+            self.after_idle(self._insert_rows_batch, self._table_generation, flat_results, sorted_headers, first)
+
+    def _insert_rows(self, flat_results: List[Dict[str, Any]], headers: List[str], start: int, stop: int):
+        """Inserts a slice of rows into the results table."""
+        for record in flat_results[start:stop]:
+            row_values = [record.get(col, "") for col in headers]
+            # Tag rows with errors in red
+            tags = self._ERROR_TAG if record.get('status_error') else self._EMPTY_TAG
+            self.tree.insert("", "end", values=row_values, tags=tags)
+
+    def _insert_rows_batch(self, generation: int, flat_results: List[Dict[str, Any]], headers: List[str], start: int):
+        """Inserts the next batch of rows and reschedules itself until the table is full."""
+        if generation != self._table_generation:
+            return # Table was cleared or repopulated since this batch was scheduled
+        stop = min(start + TABLE_BATCH_ROWS, len(flat_results))
+        self._insert_rows(flat_results, headers, start, stop)
+        if stop < len(flat_results):
+            self.after_idle(self._insert_rows_batch, generation, flat_results, headers, stop)
+
+    def _flatten_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Flattens a result record and maps the internal _store_name to a clean 'Store' key."""
+        flat = self._flatten_dict(record)
+        if '_store_name' in flat:
+            flat['Store'] = flat.pop('_store_name')
+        return flat
+
+    def _flatten_dict(self, d: Dict[str, Any], sep: str = '.') -> Dict[str, Any]:
+        """Flattens a nested dictionary iteratively, joining (and interning) key paths only at the leaves."""
+        out = {}
+        stack = [((), d)]
+        append = stack.append
+        while stack:
+            prefix, node = stack.pop()
+            for k, v in node.items():
+                path = prefix + (k,)
+                if type(v) is dict:
+                    append((path, v))
+                elif type(v) is list:
+                    out[sys.intern(sep.join(path))] = _dumps(v)
+                else:
+                    out[sys.intern(sep.join(path))] = v
+        return out
 
     def export_to_csv(self):
         """Exports the current results to a CSV file."""
@@ -450,49 +788,66 @@ class ParcelninjaSearchTool(tk.Tk):
         if not filepath:
             return 
 
+        flat_results = [flat for _, flat in self.results_data]
+        self.export_button.config(state="disabled")
+        self.status_label.config(text=f"Exporting {len(flat_results)} row(s)...")
+
+        # Write the file on the IO worker so large exports don't freeze the UI
+        self._submit_io(self._write_csv, filepath, flat_results, list(self._sorted_headers))
+        self._poll_now()
+
+    def _write_csv(self, filepath: str, flat_results: List[Dict[str, Any]], headers: List[str]):
+        """Streams the flattened results to a CSV file. Runs on the IO worker."""
+        error = None
         try:
-            # Re-flatten to ensure consistency
-            flat_results = []
-            for record in self.results_data:
-                flat = self._flatten_dict(record)
-                if '_store_name' in flat:
-                    flat['Store'] = flat.pop('_store_name')
-                flat_results.append(flat)
-
-            all_headers = ['Store'] + sorted(list(set(key for record in flat_results for key in record.keys() if key != 'Store')))
-
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=all_headers)
-                writer.writeheader()
-                writer.writerows(flat_results)
-            
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                writer.writerows([record.get(h, '') for h in headers] for record in flat_results)
+        except IOError as e:
+            error = f"Could not write to file: {e}"
+        except Exception as e:
+            # Always report back, otherwise the Export button would stay disabled
+            error = f"Export failed: {e}"
+
+        self.api_queue.put({"type": "export_done", "path": filepath, "error": error})
+
+    def _finish_export(self, filepath: str, error: Optional[str]):
+        """Reports the outcome of a background CSV export."""
+        self.export_button.config(state="normal" if self.results_data else "disabled")
+        if error:
+            self.status_label.config(text="Export failed.")
+            messagebox.showerror("Export Error", error)
+            self.log(error, "ERROR")
+        else:
+            self.status_label.config(text="Export complete.")
             messagebox.showinfo("Success", f"Successfully exported data to:\n{filepath}")
             self.log(f"Data exported to {filepath}")
 
-        except IOError as e:
-            err_msg = f"Could not write to file: {e}"
-            messagebox.showerror("Export Error", err_msg)
-            self.log(err_msg, "ERROR")
-
 def load_stores_from_env() -> List[Store]:
     """Loads all Parcelninja store credentials from environment variables."""
+    prefix = "PARCELNINJA_USER_"
+    prefix_len = len(prefix)
+    env = os.environ
+    name_for_id = STORE_ID_TO_NAME.get
     stores = []
-    user_pattern = re.compile(r"^PARCELNINJA_USER_(.+)$")
 
-    for key, value in os.environ.items():
-        match = user_pattern.match(key)
-        if match:
+    for key, value in env.items():
+        if key.startswith(prefix):
             # Strip whitespace and lower case to match keys robustly
-            store_id = match.group(1).strip()
+            store_id = key[prefix_len:].strip()
+            if not store_id:
+                continue
             username = value
-            password = os.environ.get(f"PARCELNINJA_PASS_{store_id}")
+            password = env.get("PARCELNINJA_PASS_" + store_id)
             
             if username and password:
                 clean_id = store_id.lower()
-                store_name = STORE_ID_TO_NAME.get(clean_id, f"Store ({store_id[:8]}...)")
+                store_name = name_for_id(clean_id, f"Store ({store_id[:8]}...)")
+                store_name = _STORE_NAMES_INTERN.get(store_name, store_name)
                 stores.append(Store(id=store_id, name=store_name, username=username, password=password))
     
-    return sorted(stores, key=lambda s: s.name)
+    return sorted(stores, key=operator.attrgetter('name'))
 
 if __name__ == "__main__":
     loaded_stores = load_stores_from_env()